@@ -27,23 +27,37 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import csv
-import json
-from itertools import pairwise
-from typing import List
+from dataclasses import dataclass, field, fields
+from itertools import chain
+from typing import Any, Callable, List, TextIO
 
+import ijson
 import numpy as np
-import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from genai_perf.constants import DEFAULT_ARTIFACT_DIR
 from genai_perf.llm_inputs.llm_inputs import OutputFormat
 from genai_perf.tokenizer import Tokenizer
-from genai_perf.utils import load_json, remove_sse_prefix
 from rich.console import Console
 from rich.table import Table
 
+# orjson is considerably faster on the small JSON payloads found in the
+# profile export (one per streamed response), so use it when available.
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json  # type: ignore
+
+
 _OPENAI_CHAT_COMPLETIONS = OutputFormat.OPENAI_CHAT_COMPLETIONS
 _OPENAI_COMPLETIONS = OutputFormat.OPENAI_COMPLETIONS
 
+# Maximum number of texts passed to a single tokenizer call, which bounds the
+# number of encodings held in memory at once regardless of the experiment size.
+_TOKENIZER_BATCH_SIZE = 10000
 
+
+@dataclass(slots=True)
 class Metrics:
     """A base class for all the metrics class that contains common metrics."""
 
@@ -58,43 +72,36 @@ class Metrics:
         "num_input_token",
     ]
 
-    time_fields = [
-        "inter_token_latency",
-        "time_to_first_token",
-        "request_latency",
-    ]
+    time_fields = frozenset(
+        [
+            "inter_token_latency",
+            "time_to_first_token",
+            "request_latency",
+        ]
+    )
 
     # TODO (TMA-1678): output_token_throughput_per_request is not on this list
     # since the current code treats all the throughput metrics to be displayed
     # outside of the statistics table.
-    throughput_fields = [
-        "request_throughput",
-        "output_token_throughput",
-    ]
+    throughput_fields = frozenset(
+        [
+            "request_throughput",
+            "output_token_throughput",
+        ]
+    )
 
-    def __init__(
-        self,
-        request_throughputs: List[float] = [],
-        request_latencies: List[int] = [],
-    ) -> None:
-        self.request_throughputs = request_throughputs
-        self.request_latencies = request_latencies
-        self._base_names = {
-            "request_throughputs": "request_throughput",
-            "request_latencies": "request_latency",
-        }
-
-    def __repr__(self):
-        attr_strs = []
-        for k, v in self.__dict__.items():
-            if not k.startswith("_"):
-                attr_strs.append(f"{k}={v}")
-        return f"Metrics({','.join(attr_strs)})"
+    _base_names = {
+        "request_throughputs": "request_throughput",
+        "request_latencies": "request_latency",
+    }
+
+    request_throughputs: List[float] = field(default_factory=list)
+    request_latencies: List[int] = field(default_factory=list)
 
     @property
     def data(self) -> dict:
         """Returns all the metrics."""
-        return {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+        return {f.name: getattr(self, f.name) for f in fields(self)}
 
     def get_base_name(self, metric_name: str) -> str:
         """Returns singular name of a given metric."""
@@ -104,37 +111,26 @@ class Metrics:
             raise KeyError(f"No metric named '{metric_name}' exists.")
 
 
+@dataclass(slots=True)
 class LLMMetrics(Metrics):
     """A simple dataclass that holds core LLM performance metrics."""
 
-    def __init__(
-        self,
-        request_throughputs: List[float] = [],
-        request_latencies: List[int] = [],
-        time_to_first_tokens: List[int] = [],
-        inter_token_latencies: List[list[int]] = [[]],
-        output_token_throughputs: List[float] = [],
-        output_token_throughputs_per_request: List[int] = [],
-        num_output_tokens: List[int] = [],
-        num_input_tokens: List[int] = [],
-    ) -> None:
-        super().__init__(request_throughputs, request_latencies)
-        self.time_to_first_tokens = time_to_first_tokens
-        self.inter_token_latencies = inter_token_latencies
-        self.output_token_throughputs = output_token_throughputs
-        self.output_token_throughputs_per_request = output_token_throughputs_per_request
-        self.num_output_tokens = num_output_tokens
-        self.num_input_tokens = num_input_tokens
-
-        # add base name mapping
-        self._base_names["time_to_first_tokens"] = "time_to_first_token"
-        self._base_names["inter_token_latencies"] = "inter_token_latency"
-        self._base_names["output_token_throughputs"] = "output_token_throughput"
-        self._base_names[
-            "output_token_throughputs_per_request"
-        ] = "output_token_throughput_per_request"
-        self._base_names["num_output_tokens"] = "num_output_token"
-        self._base_names["num_input_tokens"] = "num_input_token"
+    _base_names = {
+        **Metrics._base_names,
+        "time_to_first_tokens": "time_to_first_token",
+        "inter_token_latencies": "inter_token_latency",
+        "output_token_throughputs": "output_token_throughput",
+        "output_token_throughputs_per_request": "output_token_throughput_per_request",
+        "num_output_tokens": "num_output_token",
+        "num_input_tokens": "num_input_token",
+    }
+
+    time_to_first_tokens: List[int] = field(default_factory=list)
+    inter_token_latencies: List[List[int]] = field(default_factory=lambda: [[]])
+    output_token_throughputs: List[float] = field(default_factory=list)
+    output_token_throughputs_per_request: List[int] = field(default_factory=list)
+    num_output_tokens: List[int] = field(default_factory=list)
+    num_input_tokens: List[int] = field(default_factory=list)
 
 
 class Statistics:
@@ -146,7 +142,8 @@ class Statistics:
       - percentiles (p25, p50, p75, p90, p95, p99)
       - minimum & maximum
       - standard deviation
-    The class will store each calculated statistics as part of its attribute.
+    The calculated statistics are stored in a table of statistics by metrics,
+    and each of them is accessible as an attribute named <stat>_<metric>.
 
     Example:
 
@@ -155,62 +152,90 @@ class Statistics:
       >>> print(stats.avg_request_throughput)  # output: 3
     """
 
+    __slots__ = ("_metrics", "_metric_index", "_stat_table")
+
+    # row order of the statistics table; p25 to p99 are the quantiles below
+    stat_names = ["avg", "min", "p25", "p50", "p75", "p90", "p95", "p99", "max", "std"]
+    _quantiles = np.array([0.25, 0.5, 0.75, 0.9, 0.95, 0.99])
+    _stat_index = {stat: i for i, stat in enumerate(stat_names)}
+
+    # statistics (and their table rows) shown by pretty_print and export_to_csv
+    _print_stats = ["avg", "min", "max", "p99", "p90", "p75"]
+    _print_stat_rows = np.array(list(map(_stat_index.get, _print_stats)))
+    _csv_stats = ["avg", "min", "max", "p99", "p95", "p90", "p75", "p50", "p25"]
+    _csv_stat_rows = np.array(list(map(_stat_index.get, _csv_stats)))
+
     def __init__(self, metrics: Metrics):
-        # iterate through Metrics to calculate statistics and set attributes
+        # iterate through Metrics to calculate statistics of each metric
         self._metrics = metrics
+        # table columns of the metrics that have data; the statistics of the
+        # other metrics are not available
+        self._metric_index: dict[str, int] = {}
+        self._stat_table = np.empty((len(self.stat_names), len(metrics.data)))
         for attr, data in metrics.data.items():
             attr = metrics.get_base_name(attr)
             data = self._preprocess_data(data, attr)
             if data:
-                self._calculate_mean(data, attr)
-                self._calculate_percentiles(data, attr)
-                self._calculate_minmax(data, attr)
-                self._calculate_std(data, attr)
+                self._calculate_all(data, attr)
 
     def _preprocess_data(self, data: list, attr: str) -> list[int | float]:
-        new_data = []
         if attr == "inter_token_latency":
             # flatten inter token latencies to 1D
-            for d in data:
-                new_data += d
+            new_data = list(chain.from_iterable(data))
         else:
             new_data = data
         return new_data
 
-    def _calculate_mean(self, data: list[int | float], attr: str) -> None:
-        avg = np.mean(data)
-        setattr(self, "avg_" + attr, avg)
-
-    def _calculate_percentiles(self, data: list[int | float], attr: str) -> None:
-        p25, p50, p75 = np.percentile(data, [25, 50, 75])
-        p90, p95, p99 = np.percentile(data, [90, 95, 99])
-        setattr(self, "p25_" + attr, p25)
-        setattr(self, "p50_" + attr, p50)
-        setattr(self, "p75_" + attr, p75)
-        setattr(self, "p90_" + attr, p90)
-        setattr(self, "p95_" + attr, p95)
-        setattr(self, "p99_" + attr, p99)
-
-    def _calculate_minmax(self, data: list[int | float], attr: str) -> None:
-        min, max = np.min(data), np.max(data)
-        setattr(self, "min_" + attr, min)
-        setattr(self, "max_" + attr, max)
-
-    def _calculate_std(self, data: list[int | float], attr: str) -> None:
-        std = np.std(data)
-        setattr(self, "std_" + attr, std)
+    def _calculate_all(self, data: list[int | float], attr: str) -> None:
+        """Calculates mean, std, min/max and percentiles of the data at once."""
+        arr = np.asarray(data, dtype=np.float64)
+        self._metric_index[attr] = len(self._metric_index)
+        stats = self._stat_table[:, self._metric_index[attr]]
+        stats[0] = arr.mean()
+        # min and max are not taken from the 0th and 100th quantiles, which
+        # interpolate to NaN next to an infinite value
+        stats[1] = arr.min()
+        stats[2:-2] = np.quantile(arr, self._quantiles)
+        stats[-2] = arr.max()
+        stats[-1] = arr.std()
+
+    def _get_stat(self, stat: str, metric: str, default: Any = -1) -> Any:
+        """Returns the statistic of the metric, or default if not available."""
+        i = self._stat_index.get(stat)
+        j = self._metric_index.get(metric)
+        if i is None or j is None:
+            return default
+        return self._stat_table[i, j]
+
+    def _get_stat_row(self, rows: np.ndarray, metric: str) -> np.ndarray:
+        """Returns the statistics at the given table rows for the metric, or
+        -1 for all of them if the metric has no data.
+        """
+        if metric not in self._metric_index:
+            return np.full(len(rows), -1.0)
+        return self._stat_table[rows, self._metric_index[metric]]
+
+    def __getattr__(self, name: str) -> Any:
+        # only called when regular attribute lookup fails, e.g. avg_request_latency
+        if not name.startswith("_"):
+            stat, _, metric = name.partition("_")
+            value = self._get_stat(stat, metric, default=None)
+            if value is not None:
+                return value
+        raise AttributeError(f"'Statistics' object has no attribute '{name}'")
 
     def __repr__(self) -> str:
-        attr_strs = []
-        for k, v in self.__dict__.items():
-            if not k.startswith("_"):
-                attr_strs.append(f"{k}={v}")
+        attr_strs = [f"{k}={v}" for k, v in self.data.items()]
         return f"Statistics({','.join(attr_strs)})"
 
     @property
     def data(self) -> dict:
         """Return all the aggregated statistics."""
-        return {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+        data = {}
+        for metric, j in self._metric_index.items():
+            for stat, i in self._stat_index.items():
+                data[f"{stat}_{metric}"] = self._stat_table[i, j]
+        return data
 
     @property
     def metrics(self) -> Metrics:
@@ -230,8 +255,7 @@ class Statistics:
         table = Table(title="LLM Metrics")
 
         table.add_column("Statistic", justify="right", style="cyan", no_wrap=True)
-        stats = ["avg", "min", "max", "p99", "p90", "p75"]
-        for stat in stats:
+        for stat in self._print_stats:
             table.add_column(stat, justify="right", style="green")
 
         for metric in Metrics.metric_labels:
@@ -240,7 +264,7 @@ class Statistics:
             # Throughput fields are printed after the table
             is_throughput_field = self._is_throughput_field(metric)
             if is_throughput_field:
-                value = self.__dict__.get(f"{stats[0]}_{metric}", -1)
+                value = self._get_stat("avg", metric)
                 formatted_metric += f" (per sec): {value:.2f}"
                 singular_metric_rows.append(formatted_metric)
                 continue
@@ -258,11 +282,8 @@ class Statistics:
             if is_time_field:
                 formatted_metric += " (ns)"
 
-            row_values = [formatted_metric]
-
-            for stat in stats:
-                value = self.__dict__.get(f"{stat}_{metric}", -1)
-                row_values.append(f"{value:,.0f}")
+            values = self._get_stat_row(self._print_stat_rows, metric)
+            row_values = [formatted_metric] + [f"{value:,.0f}" for value in values]
 
             # Without streaming, there is no inter-token latency available, so do not print it.
             if metric == "inter_token_latency":
@@ -270,14 +291,10 @@ class Statistics:
                     continue
             # Without streaming, TTFT and request latency are the same, so do not print TTFT.
             elif metric == "time_to_first_token":
-                unique_values = False
-                for stat in stats:
-                    value_ttft = self.__dict__.get(f"{stat}_{metric}", -1)
-                    value_req_latency = self.__dict__.get(f"{stat}_request_latency", -1)
-                    if value_ttft != value_req_latency:
-                        unique_values = True
-                        break
-                if not unique_values:
+                req_latency_values = self._get_stat_row(
+                    self._print_stat_rows, "request_latency"
+                )
+                if np.array_equal(values, req_latency_values):
                     continue
 
             table.add_row(*row_values)
@@ -291,18 +308,7 @@ class Statistics:
     def export_to_csv(self, csv_filename: str) -> None:
         """Exports the statistics to a CSV file."""
 
-        multiple_metric_header = [
-            "Metric",
-            "avg",
-            "min",
-            "max",
-            "p99",
-            "p95",
-            "p90",
-            "p75",
-            "p50",
-            "p25",
-        ]
+        multiple_metric_header = ["Metric"] + self._csv_stats
 
         single_metric_header = [
             "Metric",
@@ -337,16 +343,13 @@ class Statistics:
                 row_values = [formatted_metric]
 
                 if is_throughput_field:
-                    value = self.__dict__.get(
-                        f"{multiple_metric_header[1]}_{metric}", -1
-                    )
+                    value = self._get_stat("avg", metric)
                     row_values.append(f"{value:.2f}")
                     singular_metric_rows.append(row_values)
                     continue
 
-                for stat in multiple_metric_header[1:]:
-                    value = self.__dict__.get(f"{stat}_{metric}", -1)
-                    row_values.append(f"{value:.0f}")
+                values = self._get_stat_row(self._csv_stat_rows, metric)
+                row_values += [f"{value:.0f}" for value in values]
 
                 # Without streaming, there is no inter-token latency available, so do not print it.
                 if metric == "inter_token_latency":
@@ -354,16 +357,10 @@ class Statistics:
                         continue
                 # Without streaming, TTFT and request latency are the same, so do not print TTFT.
                 elif metric == "time_to_first_token":
-                    unique_values = False
-                    for stat in multiple_metric_header[1:]:
-                        value_ttft = self.__dict__.get(f"{stat}_{metric}", -1)
-                        value_req_latency = self.__dict__.get(
-                            f"{stat}_request_latency", -1
-                        )
-                        if value_ttft != value_req_latency:
-                            unique_values = True
-                            break
-                    if not unique_values:
+                    req_latency_values = self._get_stat_row(
+                        self._csv_stat_rows, "request_latency"
+                    )
+                    if np.array_equal(values, req_latency_values):
                         continue
 
                 csv_writer.writerow(row_values)
@@ -374,50 +371,64 @@ class Statistics:
                 csv_writer.writerow(row)
 
     def export_parquet(self, parquet_filename: str) -> None:
-        max_length = -1
-        col_index = 0
-        filler_list = []
-        df = pd.DataFrame()
-        # Data frames require all columns of the same length
-        # find the max length column
-        for key, value in self._metrics.data.items():
-            max_length = max(max_length, len(value))
-        # Insert None for shorter columns to match longest column
-        for key, value in self._metrics.data.items():
-            if len(value) < max_length:
-                diff = max_length - len(value)
-                filler_list = [None] * diff
-            df.insert(col_index, key, value + filler_list)
-            diff = 0
-            filler_list = []
-            col_index = col_index + 1
-        df.to_parquet(
-            f"{DEFAULT_ARTIFACT_DIR}/data/{parquet_filename}.gzip", compression="gzip"
+        """Exports the raw metrics to a parquet file."""
+        metrics_data = self._metrics.data
+        # Parquet tables require all columns of the same length, so pad the
+        # shorter columns with nulls to match the longest column
+        max_length = max(map(len, metrics_data.values()), default=0)
+        columns = {}
+        for key, value in metrics_data.items():
+            column = pa.array(value)
+            if len(column) < max_length:
+                filler = pa.nulls(max_length - len(column), type=column.type)
+                column = pa.concat_arrays([column, filler])
+            columns[key] = column
+        pq.write_table(
+            pa.table(columns),
+            f"{DEFAULT_ARTIFACT_DIR}/data/{parquet_filename}.gzip",
+            compression="gzip",
         )
 
 
+class _Utf8Reader:
+    """Reads a text file as UTF-8 encoded bytes, which is what ijson expects."""
+
+    def __init__(self, file: TextIO) -> None:
+        self._file = file
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size).encode("utf-8")
+
+
 class ProfileDataParser:
     """Base profile data parser class that reads the profile data JSON file to
     extract core metrics and calculate various performance statistics.
     """
 
     def __init__(self, filename: str) -> None:
-        data = load_json(filename)
-        self._parse_profile_data(data)
+        self._parse_profile_data(filename)
 
-    def _parse_profile_data(self, data: dict) -> None:
+    def _parse_profile_data(self, filename: str) -> None:
         """Parse through the entire profile data to collect statistics."""
         self._profile_results = {}
-        for experiment in data["experiments"]:
-            infer_mode = experiment["experiment"]["mode"]
-            load_level = experiment["experiment"]["value"]
-            requests = experiment["requests"]
+        # Stream the experiments one at a time instead of loading the entire
+        # (potentially very large) profile export file into memory. Invalid
+        # UTF-8 bytes (e.g. a multibyte character split between two streamed
+        # responses) are ignored, as in utils.load_json.
+        with open(filename, encoding="utf-8", errors="ignore") as f:
+            experiments = ijson.items(
+                _Utf8Reader(f), "experiments.item", use_float=True
+            )
+            for experiment in experiments:
+                infer_mode = experiment["experiment"]["mode"]
+                load_level = experiment["experiment"]["value"]
+                requests = experiment["requests"]
 
-            metrics = self._parse_requests(requests)
+                metrics = self._parse_requests(requests)
 
-            # aggregate and calculate statistics
-            statistics = Statistics(metrics)
-            self._profile_results[(infer_mode, str(load_level))] = statistics
+                # aggregate and calculate statistics
+                statistics = Statistics(metrics)
+                self._profile_results[(infer_mode, str(load_level))] = statistics
 
     def _parse_requests(self, requests: dict) -> LLMMetrics:
         """Parse each request in profile data to extract core metrics."""
@@ -476,166 +487,183 @@ class LLMProfileDataParser(ProfileDataParser):
 
     def _parse_requests(self, requests: dict) -> LLMMetrics:
         """Parse each requests in profile export data to extract key metrics."""
-        min_req_timestamp, max_res_timestamp = float("inf"), 0
-        request_latencies = []
-        time_to_first_tokens = []
-        inter_token_latencies = []
-        output_token_throughputs_per_request = []
-        num_input_tokens = []
-        num_generated_tokens = []
+        # Collect the texts of all requests first so that the tokenizer only
+        # needs to be invoked once for all the inputs and once for all the
+        # outputs instead of twice per request.
+        req_timestamps = []
+        all_res_timestamps = []
+        input_texts = []
+        output_texts = []
+        output_offsets = [0]
         for request in requests:
             req_timestamp = request["timestamp"]
             req_inputs = request["request_inputs"]
             res_timestamps = request["response_timestamps"]
             res_outputs = request["response_outputs"]
 
-            self._preprocess_response(res_timestamps, res_outputs)
+            res_texts = self._get_response_output_texts(res_outputs)
+            self._preprocess_response(res_timestamps, res_texts)
 
             # Skip requests with empty response. This happens sometimes when the
             # model returns a single response with empty string.
             if not res_timestamps:
                 continue
 
-            # track entire benchmark duration
-            min_req_timestamp = min(min_req_timestamp, req_timestamp)
-            max_res_timestamp = max(max_res_timestamp, res_timestamps[-1])
-
-            # request latencies
-            req_latency = res_timestamps[-1] - req_timestamp
-            request_latencies.append(req_latency)  # nanosec
-            req_latency = req_latency / 1e9  # sec
-
-            # time to first token
-            time_to_first_tokens.append(res_timestamps[0] - req_timestamp)
-
-            # number of input tokens
-            input_tokens = self._tokenize_request_inputs(req_inputs)
-            num_input_tokens.append(len(input_tokens))
-
-            # output token throughput per request
-            output_tokens = self._tokenize_response_outputs(res_outputs)
-            num_output_tokens = list(map(len, output_tokens))
-            total_output_tokens = np.sum(num_output_tokens)
-            output_token_throughputs_per_request.append(
-                total_output_tokens / req_latency
+            req_timestamps.append(req_timestamp)
+            all_res_timestamps.append(res_timestamps)
+            input_texts.append(self._get_request_input_text(req_inputs))
+            # exclamation mark trick forces the llama tokenization to
+            # consistently start each output with a specific token which allows
+            # us to safely skip the first token of every tokenized output and
+            # get only the ones that are returned by the model
+            output_texts.extend("!" + txt for txt in res_texts)
+            output_offsets.append(len(output_texts))
+
+        # Per-request metrics are kept in (preallocated) arrays, one per metric.
+        num_requests = len(req_timestamps)
+        num_input_tokens = np.asarray(
+            self._count_tokens(self._tokenize_inputs, input_texts), dtype=np.int64
+        )
+        all_num_output_tokens = self._count_tokens(self._run_tokenizer, output_texts)
+
+        request_starts = np.asarray(req_timestamps, dtype=np.int64)
+        response_starts = np.empty(num_requests, dtype=np.int64)
+        response_ends = np.empty(num_requests, dtype=np.int64)
+        num_generated_tokens = np.empty(num_requests, dtype=np.int64)
+        request_bounds = list(zip(output_offsets, output_offsets[1:]))
+        for i, (start, end) in enumerate(request_bounds):
+            response_starts[i] = all_res_timestamps[i][0]
+            response_ends[i] = all_res_timestamps[i][-1]
+
+            # number of output tokens
+            num_generated_tokens[i] = sum(all_num_output_tokens[start:end])
+
+        # inter token latency, computed over the responses of all the requests
+        # at once. Response k of a request with responses [start, end) has the
+        # latency at index k - 1 of the flat diff, i.e. the slice [start, end - 1).
+        # TMA-1676: handle empty first/last responses
+        # if the latter response has zero token (e.g. empty string),
+        # then set it default to one for the sake of inter token latency
+        # calculation and to avoid divide by zero.
+        res_timestamps = np.fromiter(
+            chain.from_iterable(all_res_timestamps),
+            dtype=np.int64,
+            count=len(all_num_output_tokens),
+        )
+        num_output_tokens = np.asarray(all_num_output_tokens, dtype=np.int64)
+        num_output_tokens = np.where(num_output_tokens == 0, 1, num_output_tokens)
+        itls = np.rint(np.diff(res_timestamps) / num_output_tokens[1:])
+        itls = itls.astype(np.int64).tolist()
+        inter_token_latencies = [itls[start : end - 1] for start, end in request_bounds]
+
+        # request latencies & time to first token (nanosec)
+        request_latencies = response_ends - request_starts
+        time_to_first_tokens = response_starts - request_starts
+
+        # output token throughput per request. A request with zero latency has
+        # an infinite throughput (NaN if it has no output tokens either).
+        with np.errstate(divide="ignore", invalid="ignore"):
+            output_token_throughputs_per_request = num_generated_tokens / (
+                request_latencies / 1e9  # sec
             )
-            num_generated_tokens.append(total_output_tokens)
-
-            # inter token latency
-            itl_per_request = []
-            for (t1, _), (t2, n2) in pairwise(zip(res_timestamps, num_output_tokens)):
-                # TMA-1676: handle empty first/last responses
-                # if the latter response has zero token (e.g. empty string),
-                # then set it default to one for the sake of inter token latency
-                # calculation and to avoid divide by zero.
-                num_token = 1 if n2 == 0 else n2
-                itl_per_request.append(round((t2 - t1) / num_token))
-            inter_token_latencies.append(itl_per_request)
-
-        # request & output token throughput
-        benchmark_duration = (max_res_timestamp - min_req_timestamp) / 1e9  # nanosec
+
+        # request & output token throughput over the entire benchmark duration
+        if num_requests > 0:
+            benchmark_duration = (response_ends.max() - request_starts.min()) / 1e9
+        else:
+            benchmark_duration = float("inf")  # no successful request
         request_throughputs = [len(requests) / benchmark_duration]
-        output_token_throughputs = [sum(num_generated_tokens) / benchmark_duration]
+        output_token_throughputs = [num_generated_tokens.sum() / benchmark_duration]
 
+        # LLMMetrics (and the plots/exports built on it) work with plain lists
         return LLMMetrics(
             request_throughputs,
-            request_latencies,
-            time_to_first_tokens,
+            request_latencies.tolist(),
+            time_to_first_tokens.tolist(),
             inter_token_latencies,
             output_token_throughputs,
-            output_token_throughputs_per_request,
-            num_generated_tokens,
-            num_input_tokens,
+            output_token_throughputs_per_request.tolist(),
+            num_generated_tokens.tolist(),
+            num_input_tokens.tolist(),
         )
 
     def _preprocess_response(
-        self, res_timestamps: list[int], res_outputs: list[dict[str, str]]
+        self, res_timestamps: list[int], res_texts: list[str]
     ) -> None:
         """Helper function to preprocess responses of a request."""
         if self._service_kind == "openai":
             # Remove responses without any content
             # These are only observed to happen at the start or end
-            while res_outputs[0] and self._is_openai_empty_response(
-                res_outputs[0]["response"]
-            ):
+            while res_texts and not res_texts[0]:
                 res_timestamps.pop(0)
-                res_outputs.pop(0)
+                res_texts.pop(0)
 
-            while res_outputs[-1] and self._is_openai_empty_response(
-                res_outputs[-1]["response"]
-            ):
+            while res_texts and not res_texts[-1]:
                 res_timestamps.pop()
-                res_outputs.pop()
+                res_texts.pop()
 
-    def _tokenize_request_inputs(self, req_inputs: dict) -> list[int]:
-        """Deserialize the request input and return tokenized inputs."""
+    def _get_request_input_text(self, req_inputs: dict) -> str:
+        """Deserialize the request input and return the input text."""
         if self._service_kind == "triton":
-            return self._tokenize_triton_request_input(req_inputs)
+            return self._get_triton_request_input_text(req_inputs)
         elif self._service_kind == "openai":
-            return self._tokenize_openai_request_input(req_inputs)
+            return self._get_openai_request_input_text(req_inputs)
         else:
             raise ValueError(f"Unknown service kind: '{self._service_kind}'.")
 
-    def _tokenize_triton_request_input(self, req_inputs: dict) -> list[int]:
-        """Tokenize the Triton request input texts."""
-        encodings = self._tokenizer(req_inputs["text_input"])
-        return encodings.data["input_ids"]
+    def _get_triton_request_input_text(self, req_inputs: dict) -> str:
+        """Return the Triton request input text."""
+        return req_inputs["text_input"]
 
-    def _tokenize_openai_request_input(self, req_inputs: dict) -> list[int]:
-        """Tokenize the OpenAI request input texts."""
-        payload = json.loads(req_inputs["payload"])
+    def _get_openai_request_input_text(self, req_inputs: dict) -> str:
+        """Return the OpenAI request input text."""
+        payload = _json.loads(req_inputs["payload"])
         if self._output_format == _OPENAI_CHAT_COMPLETIONS:
-            input_text = payload["messages"][0]["content"]
+            return payload["messages"][0]["content"]
         elif self._output_format == _OPENAI_COMPLETIONS:
-            input_text = payload["prompt"][0]
+            return payload["prompt"][0]
         else:
             raise ValueError(
                 "Failed to parse OpenAI request input in profile export file."
             )
-        encodings = self._tokenizer(input_text)
-        return encodings.data["input_ids"]
 
-    def _tokenize_response_outputs(self, res_outputs: dict) -> list[list[int]]:
-        """Deserialize the response output and return tokenized outputs."""
+    def _get_response_output_texts(self, res_outputs: dict) -> list[str]:
+        """Deserialize the response output and return the output texts."""
         if self._service_kind == "triton":
-            return self._tokenize_triton_response_output(res_outputs)
+            return self._get_triton_response_output_texts(res_outputs)
         elif self._service_kind == "openai":
-            return self._tokenize_openai_response_output(res_outputs)
+            return self._get_openai_response_output_texts(res_outputs)
         else:
             raise ValueError(f"Unknown service kind: '{self._service_kind}'.")
 
-    def _tokenize_triton_response_output(self, res_outputs: dict) -> list[list[int]]:
-        """Tokenize the Triton response output texts."""
-        output_texts = []
-        for output in res_outputs:
-            output_texts.append(output["text_output"])
-        return self._run_tokenizer(output_texts)
+    def _get_triton_response_output_texts(self, res_outputs: dict) -> list[str]:
+        """Return the Triton response output texts."""
+        return [output["text_output"] for output in res_outputs]
 
-    def _tokenize_openai_response_output(self, res_outputs: dict) -> list[list[int]]:
-        """Tokenize the OpenAI response output texts."""
-        output_texts = []
+    def _get_openai_response_output_texts(self, res_outputs: dict) -> list[str]:
+        """Return the OpenAI response output texts."""
+        # The streamed responses of a request share the same id and created
+        # fields, so a repeated token yields an identical response to reuse.
+        texts_by_response: dict[str, str] = {}
+        texts = []
         for output in res_outputs:
-            text = self._extract_openai_text_output(output["response"])
-            output_texts.append(text)
-        return self._run_tokenizer(output_texts)
-
-    def _run_tokenizer(self, output_texts: list[str]) -> list[list[int]]:
-        # exclamation mark trick forces the llama tokenization to consistently
-        # start each output with a specific token which allows us to safely skip
-        # the first token of every tokenized output and get only the ones that
-        # are returned by the model
-        output_texts = ["!" + txt for txt in output_texts]
-        encodings = self._tokenizer(output_texts)
-        return [out[1:] for out in encodings.data["input_ids"]]
+            response = output["response"]
+            text = texts_by_response.get(response)
+            if text is None:
+                text = self._extract_openai_text_output(response)
+                texts_by_response[response] = text
+            texts.append(text)
+        return texts
 
     def _extract_openai_text_output(self, response: str) -> str:
         """Extracts text/content of the OpenAI response object."""
-        response = remove_sse_prefix(response)
-
-        if response == "[DONE]":
+        # remove_sse_prefix() inlined as this runs for every response. Empty
+        # (keep-alive) and [DONE] chunks carry no text, so skip JSON parsing.
+        response = response.removeprefix("data: ").strip()
+        if not response or response == "[DONE]":
             return ""
 
-        data = json.loads(response)
+        data = _json.loads(response)
         completions = data["choices"][0]
 
         text_output = ""
@@ -650,9 +678,29 @@ class LLMProfileDataParser(ProfileDataParser):
             raise ValueError(f"Unknown OpenAI response object type '{obj_type}'.")
         return text_output
 
-    def _is_openai_empty_response(self, response: str) -> bool:
-        """Returns true if the response is an openai response with no content (or empty content)"""
-        text = self._extract_openai_text_output(response)
-        if text:
-            return False
-        return True
+    def _count_tokens(
+        self, tokenize: Callable[[list[str]], list[list[int]]], texts: list[str]
+    ) -> list[int]:
+        """Return the number of tokens of each text, tokenizing the texts in
+        batches of at most _TOKENIZER_BATCH_SIZE.
+        """
+        num_tokens = []
+        for i in range(0, len(texts), _TOKENIZER_BATCH_SIZE):
+            num_tokens.extend(map(len, tokenize(texts[i : i + _TOKENIZER_BATCH_SIZE])))
+        return num_tokens
+
+    def _tokenize_inputs(self, input_texts: list[str]) -> list[list[int]]:
+        """Tokenize a batch of request input texts."""
+        if not input_texts:
+            return []
+        encodings = self._tokenizer(input_texts)
+        return encodings.data["input_ids"]
+
+    def _run_tokenizer(self, output_texts: list[str]) -> list[list[int]]:
+        """Tokenize a batch of "!"-prefixed response output texts, dropping the
+        token of the leading exclamation mark from each output.
+        """
+        if not output_texts:
+            return []
+        encodings = self._tokenizer(output_texts)
+        return [out[1:] for out in encodings.data["input_ids"]]
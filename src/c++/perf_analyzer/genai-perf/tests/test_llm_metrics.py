@@ -28,12 +28,15 @@
 
 import json
 from io import StringIO
+from pathlib import Path
 from typing import Any, List
 
 import numpy as np
+import pandas
+import pyarrow.parquet as pq
 import pytest
 from genai_perf.llm_inputs.llm_inputs import OutputFormat
-from genai_perf.llm_metrics import LLMMetrics, LLMProfileDataParser
+from genai_perf.llm_metrics import LLMMetrics, LLMProfileDataParser, Statistics
 from genai_perf.tokenizer import DEFAULT_TOKENIZER
 from transformers import AutoTokenizer
 
@@ -53,6 +56,14 @@ class TestLLMProfileDataParser:
           contents of self.triton_profile_data
         - For "openai_profile_export.json", it will read and return the
           contents of self.openai_profile_data
+        - For "openai_empty_response_profile_export.json", it will read and
+          return the contents of self.openai_empty_response_profile_data
+        - For "openai_keep_alive_profile_export.json", it will read and return
+          the contents of self.openai_keep_alive_profile_data
+        - For "triton_no_response_profile_export.json", it will read and
+          return the contents of self.triton_no_response_profile_data
+        - For "triton_zero_latency_profile_export.json", it will read and
+          return the contents of self.triton_zero_latency_profile_data
         - For "profile_export.csv", it will capture all data written to
           the file, and return it as the return value of this function
         - For all other files, it will behave like the normal open function
@@ -60,6 +71,23 @@ class TestLLMProfileDataParser:
 
         written_data = []
 
+        profile_data = {
+            "triton_profile_export.json": self.triton_profile_data,
+            "openai_profile_export.json": self.openai_profile_data,
+            "openai_empty_response_profile_export.json": (
+                self.openai_empty_response_profile_data
+            ),
+            "openai_keep_alive_profile_export.json": (
+                self.openai_keep_alive_profile_data
+            ),
+            "triton_no_response_profile_export.json": (
+                self.triton_no_response_profile_data
+            ),
+            "triton_zero_latency_profile_export.json": (
+                self.triton_zero_latency_profile_data
+            ),
+        }
+
         original_open = open
 
         def custom_open(filename, *args, **kwargs):
@@ -67,11 +95,8 @@ class TestLLMProfileDataParser:
                 written_data.append(content)
                 return len(content)
 
-            if filename == "triton_profile_export.json":
-                tmp_file = StringIO(json.dumps(self.triton_profile_data))
-                return tmp_file
-            elif filename == "openai_profile_export.json":
-                tmp_file = StringIO(json.dumps(self.openai_profile_data))
+            if filename in profile_data:
+                tmp_file = StringIO(json.dumps(profile_data[filename]))
                 return tmp_file
             elif filename == "profile_export.csv":
                 tmp_file = StringIO()
@@ -355,6 +380,98 @@ class TestLLMProfileDataParser:
         with pytest.raises(KeyError):
             pd.get_statistics(infer_mode="concurrency", load_level="40")
 
+    def test_invalid_utf8_output(self, tmp_path: Path) -> None:
+        """Check that invalid UTF-8 bytes in the profile export are ignored.
+
+        The responses of the first request end with an invalid byte and with a
+        multibyte character cut in half, which leaves the same texts (and
+        metrics) as in test_triton_llm_profile_data once they are ignored.
+        """
+        data = json.dumps(self.triton_profile_data).encode()
+        data = data.replace(b'" like"', b'" like\xff"')
+        data = data.replace(b'" dogs"', b'" dogs\xe2\x82"')
+        filename = tmp_path / "profile_export.json"
+        filename.write_bytes(data)
+
+        tokenizer = AutoTokenizer.from_pretrained(DEFAULT_TOKENIZER)
+        pd = LLMProfileDataParser(
+            filename=str(filename),
+            service_kind="triton",
+            output_format=OutputFormat.TENSORRTLLM,
+            tokenizer=tokenizer,
+        )
+
+        metrics = pd.get_statistics(infer_mode="concurrency", load_level="10").metrics
+        assert metrics.time_to_first_tokens == [2, 2]
+        assert metrics.inter_token_latencies == [[2, 3], [1, 2]]
+        assert metrics.num_output_tokens == [3, 6]
+        assert metrics.num_input_tokens == [3, 4]
+
+    def test_openai_empty_response(self, mock_read_write: pytest.MonkeyPatch) -> None:
+        """Check that a request without any content in its responses is skipped.
+
+        Metrics
+        * time to first tokens
+            - experiment 1: [5 - 1] = [4]
+        * inter token latencies
+            - experiment 1: [[(8 - 5)/1, (12 - 8)/1]] = [[3, 4]]
+        * output token throughputs
+            - experiment 1: [3/(12 - 1)] = [3/11]
+        * request throughputs (both requests are counted)
+            - experiment 1: [2/(12 - 1)] = [2/11]
+        """
+        tokenizer = AutoTokenizer.from_pretrained(DEFAULT_TOKENIZER)
+        pd = LLMProfileDataParser(
+            filename="openai_empty_response_profile_export.json",
+            service_kind="openai",
+            output_format=OutputFormat.OPENAI_CHAT_COMPLETIONS,
+            tokenizer=tokenizer,
+        )
+
+        stat = pd.get_statistics(infer_mode="concurrency", load_level="10")
+        metrics = stat.metrics
+        assert isinstance(metrics, LLMMetrics)
+
+        assert metrics.request_latencies == [11]
+        assert metrics.time_to_first_tokens == [4]
+        assert metrics.inter_token_latencies == [[3, 4]]
+        assert metrics.output_token_throughputs == pytest.approx([3 / ns_to_sec(11)])
+        assert metrics.request_throughputs == pytest.approx([2 / ns_to_sec(11)])
+        assert metrics.num_output_tokens == [3]
+        assert metrics.num_input_tokens == [3]
+
+    def test_openai_keep_alive_responses(
+        self, mock_read_write: pytest.MonkeyPatch
+    ) -> None:
+        """Check that empty (keep-alive) and [DONE] responses are ignored.
+
+        Metrics
+        * time to first tokens
+            - experiment 1: [5 - 1, 7 - 2] = [4, 5]
+        * inter token latencies
+            - experiment 1: [[(8 - 5)/1, (12 - 8)/1], [(11 - 7)/3, (15 - 11)/2]]
+                          : [[3, 4], [1, 2]]  # rounded
+        * num output tokens
+            - experiment 1: [3, 6]
+        """
+        tokenizer = AutoTokenizer.from_pretrained(DEFAULT_TOKENIZER)
+        pd = LLMProfileDataParser(
+            filename="openai_keep_alive_profile_export.json",
+            service_kind="openai",
+            output_format=OutputFormat.OPENAI_CHAT_COMPLETIONS,
+            tokenizer=tokenizer,
+        )
+
+        stat = pd.get_statistics(infer_mode="concurrency", load_level="10")
+        metrics = stat.metrics
+        assert isinstance(metrics, LLMMetrics)
+
+        assert metrics.request_latencies == [11, 13]
+        assert metrics.time_to_first_tokens == [4, 5]
+        assert metrics.inter_token_latencies == [[3, 4], [1, 2]]
+        assert metrics.num_output_tokens == [3, 6]
+        assert metrics.num_input_tokens == [3, 4]
+
     def test_llm_metrics_get_base_name(self) -> None:
         """Test get_base_name method in LLMMetrics class."""
         # initialize with dummy values
@@ -379,6 +496,160 @@ class TestLLMProfileDataParser:
         with pytest.raises(KeyError):
             metrics.get_base_name("hello1234")
 
+    def test_no_successful_request(self, mock_read_write: pytest.MonkeyPatch) -> None:
+        """Check the metrics of an experiment where no request got a response."""
+        tokenizer = AutoTokenizer.from_pretrained(DEFAULT_TOKENIZER)
+        pd = LLMProfileDataParser(
+            filename="triton_no_response_profile_export.json",
+            service_kind="triton",
+            output_format=OutputFormat.TENSORRTLLM,
+            tokenizer=tokenizer,
+        )
+
+        stat = pd.get_statistics(infer_mode="concurrency", load_level="1")
+        metrics = stat.metrics
+        assert isinstance(metrics, LLMMetrics)
+
+        assert metrics.request_throughputs == [0.0]
+        assert not np.signbit(metrics.request_throughputs[0])
+        assert metrics.output_token_throughputs == [0.0]
+        assert not np.signbit(metrics.output_token_throughputs[0])
+        assert metrics.request_latencies == []
+        assert metrics.time_to_first_tokens == []
+        assert metrics.inter_token_latencies == []
+        assert metrics.output_token_throughputs_per_request == []
+        assert metrics.num_output_tokens == []
+        assert metrics.num_input_tokens == []
+
+        assert stat.avg_request_throughput == 0  # type: ignore
+        assert stat.avg_output_token_throughput == 0  # type: ignore
+        with pytest.raises(AttributeError):
+            stat.avg_request_latency  # type: ignore
+
+    def test_zero_latency_request(self, mock_read_write: pytest.MonkeyPatch) -> None:
+        """Check that a request with zero latency has an infinite output token
+        throughput.
+
+        Metrics
+        * request latencies
+            - experiment 1: [8 - 1, 10 - 10] = [7, 0]
+        * output token throughputs per request
+            - experiment 1: [3/(8 - 1), 1/0] = [3/7, inf]
+        """
+        tokenizer = AutoTokenizer.from_pretrained(DEFAULT_TOKENIZER)
+        # the deviation from an infinite mean is NaN, but dividing by the zero
+        # latency itself is expected and does not warn
+        with pytest.warns(RuntimeWarning, match="invalid value") as record:
+            pd = LLMProfileDataParser(
+                filename="triton_zero_latency_profile_export.json",
+                service_kind="triton",
+                output_format=OutputFormat.TENSORRTLLM,
+                tokenizer=tokenizer,
+            )
+        assert not any("divide by zero" in str(w.message) for w in record)
+
+        stat = pd.get_statistics(infer_mode="concurrency", load_level="1")
+        metrics = stat.metrics
+        assert metrics.request_latencies == [7, 0]
+        assert metrics.num_output_tokens == [3, 1]
+        ottpr = [3 / ns_to_sec(7), float("inf")]
+        assert metrics.output_token_throughputs_per_request == pytest.approx(ottpr)
+
+        min_ottpr = 3 / ns_to_sec(7)
+        assert stat.min_output_token_throughput_per_request == pytest.approx(min_ottpr)  # type: ignore
+        assert stat.max_output_token_throughput_per_request == float("inf")  # type: ignore
+        assert stat.avg_output_token_throughput_per_request == float("inf")  # type: ignore
+        assert np.isnan(stat.std_output_token_throughput_per_request)  # type: ignore
+
+    def test_statistics_of_infinite_values(self) -> None:
+        """Check that infinite and NaN statistics of a metric are available."""
+        metrics = LLMMetrics(output_token_throughputs_per_request=[3.0, float("inf")])
+        # the deviation from an infinite mean is NaN
+        with pytest.warns(RuntimeWarning, match="invalid value"):
+            stat = Statistics(metrics)
+
+        assert stat.avg_output_token_throughput_per_request == float("inf")  # type: ignore
+        assert stat.min_output_token_throughput_per_request == 3.0  # type: ignore
+        assert stat.p25_output_token_throughput_per_request == float("inf")  # type: ignore
+        assert stat.max_output_token_throughput_per_request == float("inf")  # type: ignore
+        assert np.isnan(stat.std_output_token_throughput_per_request)  # type: ignore
+        for stat_name in Statistics.stat_names:
+            assert f"{stat_name}_output_token_throughput_per_request" in stat.data
+
+        # metrics without any data have no statistics
+        assert "avg_request_latency" not in stat.data
+        with pytest.raises(AttributeError):
+            stat.avg_request_latency  # type: ignore
+
+    def test_export_parquet(
+        self, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """Check that the raw metrics round-trip through the parquet export,
+        with the shorter columns padded with nulls.
+        """
+        monkeypatch.setattr("genai_perf.llm_metrics.DEFAULT_ARTIFACT_DIR", tmp_path)
+        (tmp_path / "data").mkdir()
+        metrics = LLMMetrics(
+            request_throughputs=[10.5],
+            request_latencies=[3, 44, 5],
+            time_to_first_tokens=[1, 2],
+            inter_token_latencies=[[4, 5], [6], [7, 8, 9]],
+            output_token_throughputs=[22.25],
+            output_token_throughputs_per_request=[7.5, 8.0, 9.25],
+            num_output_tokens=[3, 4, 5],
+            num_input_tokens=[12, 34, 56],
+        )
+        Statistics(metrics).export_parquet("all_data")
+
+        filename = tmp_path / "data" / "all_data.gzip"
+        metadata = pq.ParquetFile(filename).metadata
+        assert metadata.row_group(0).column(0).compression == "GZIP"
+
+        df = pandas.read_parquet(filename)
+        assert list(df.columns) == list(metrics.data)
+        assert df["request_latencies"].tolist() == [3, 44, 5]
+        assert df["output_token_throughputs_per_request"].tolist() == [7.5, 8.0, 9.25]
+        assert df["num_output_tokens"].tolist() == [3, 4, 5]
+        assert df["num_input_tokens"].tolist() == [12, 34, 56]
+        assert [list(itl) for itl in df["inter_token_latencies"]] == [
+            [4, 5],
+            [6],
+            [7, 8, 9],
+        ]
+
+        # shorter columns are padded with nulls
+        assert df["request_throughputs"].tolist()[0] == 10.5
+        assert df["request_throughputs"].isna().tolist() == [False, True, True]
+        assert df["time_to_first_tokens"].tolist()[:2] == [1, 2]
+        assert df["time_to_first_tokens"].isna().tolist() == [False, False, True]
+        assert df["output_token_throughputs"].tolist()[0] == 22.25
+        assert df["output_token_throughputs"].isna().tolist() == [False, True, True]
+
+    def test_tokenizer_batches(
+        self, mock_read_write: pytest.MonkeyPatch, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Check that tokenizing the texts in small batches gives the same token
+        counts as tokenizing them all at once.
+        """
+        monkeypatch.setattr("genai_perf.llm_metrics._TOKENIZER_BATCH_SIZE", 2)
+        tokenizer = AutoTokenizer.from_pretrained(DEFAULT_TOKENIZER)
+        pd = LLMProfileDataParser(
+            filename="triton_profile_export.json",
+            service_kind="triton",
+            output_format=OutputFormat.TENSORRTLLM,
+            tokenizer=tokenizer,
+        )
+
+        metrics = pd.get_statistics(infer_mode="concurrency", load_level="10").metrics
+        assert metrics.inter_token_latencies == [[2, 3], [1, 2]]
+        assert metrics.num_output_tokens == [3, 6]
+        assert metrics.num_input_tokens == [3, 4]
+
+        metrics = pd.get_statistics(infer_mode="request_rate", load_level="2.0").metrics
+        assert metrics.inter_token_latencies == [[1, 5, 5], [2, 2]]
+        assert metrics.num_output_tokens == [4, 6]
+        assert metrics.num_input_tokens == [3, 4]
+
     openai_profile_data = {
         "experiments": [
             {
@@ -444,6 +715,169 @@ class TestLLMProfileDataParser:
         ],
     }
 
+    openai_empty_response_profile_data = {
+        "experiments": [
+            {
+                "experiment": {
+                    "mode": "concurrency",
+                    "value": 10,
+                },
+                "requests": [
+                    {
+                        "timestamp": 1,
+                        "request_inputs": {
+                            "payload": '{"messages":[{"role":"user","content":"This is test"}],"model":"llama-2-7b","stream":true}',
+                        },
+                        "response_timestamps": [3, 5, 8, 12, 13],
+                        "response_outputs": [
+                            {
+                                "response": 'data: {"id":"abc","object":"chat.completion.chunk","created":123,"model":"llama-2-7b","choices":[{"index":0,"delta":{"role":"assistant"},"finish_reason":null}]}\n\n'
+                            },
+                            {
+                                "response": 'data: {"id":"abc","object":"chat.completion.chunk","created":123,"model":"llama-2-7b","choices":[{"index":0,"delta":{"content":"I"},"finish_reason":null}]}\n\n'
+                            },
+                            {
+                                "response": 'data: {"id":"abc","object":"chat.completion.chunk","created":123,"model":"llama-2-7b","choices":[{"index":0,"delta":{"content":" like"},"finish_reason":null}]}\n\n'
+                            },
+                            {
+                                "response": 'data: {"id":"abc","object":"chat.completion.chunk","created":123,"model":"llama-2-7b","choices":[{"index":0,"delta":{"content":" dogs"},"finish_reason":null}]}\n\n'
+                            },
+                            {"response": "data: [DONE]\n\n"},
+                        ],
+                    },
+                    {
+                        "timestamp": 2,
+                        "request_inputs": {
+                            "payload": '{"messages":[{"role":"user","content":"This is test too"}],"model":"llama-2-7b","stream":true}',
+                        },
+                        # none of the responses have any "content", so the
+                        # request will be ignored
+                        "response_timestamps": [4, 7, 9],
+                        "response_outputs": [
+                            {
+                                "response": 'data: {"id":"abc","object":"chat.completion.chunk","created":123,"model":"llama-2-7b","choices":[{"index":0,"delta":{"role":"assistant"},"finish_reason":null}]}\n\n'
+                            },
+                            {
+                                "response": 'data: {"id":"abc","object":"chat.completion.chunk","created":123,"model":"llama-2-7b","choices":[{"index":0,"delta":{},"finish_reason":null}]}\n\n'
+                            },
+                            {"response": "data: [DONE]\n\n"},
+                        ],
+                    },
+                ],
+            },
+        ],
+    }
+
+    openai_keep_alive_profile_data = {
+        "experiments": [
+            {
+                "experiment": {
+                    "mode": "concurrency",
+                    "value": 10,
+                },
+                "requests": [
+                    {
+                        "timestamp": 1,
+                        "request_inputs": {
+                            "payload": '{"messages":[{"role":"user","content":"This is test"}],"model":"llama-2-7b","stream":true}',
+                        },
+                        # the first two, and the last two responses will be
+                        # ignored because they are empty (keep-alive) or [DONE]
+                        "response_timestamps": [2, 3, 5, 8, 12, 13, 14],
+                        "response_outputs": [
+                            {"response": "data: \n\n"},
+                            {"response": "data: \n\n"},
+                            {
+                                "response": 'data: {"id":"abc","object":"chat.completion.chunk","created":123,"model":"llama-2-7b","choices":[{"index":0,"delta":{"content":"I"},"finish_reason":null}]}\n\n'
+                            },
+                            {
+                                "response": 'data: {"id":"abc","object":"chat.completion.chunk","created":123,"model":"llama-2-7b","choices":[{"index":0,"delta":{"content":" like"},"finish_reason":null}]}\n\n'
+                            },
+                            {
+                                "response": 'data: {"id":"abc","object":"chat.completion.chunk","created":123,"model":"llama-2-7b","choices":[{"index":0,"delta":{"content":" dogs"},"finish_reason":null}]}\n\n'
+                            },
+                            {"response": "data: \n\n"},
+                            {"response": "data: [DONE]\n\n"},
+                        ],
+                    },
+                    {
+                        "timestamp": 2,
+                        "request_inputs": {
+                            "payload": '{"messages":[{"role":"user","content":"This is test too"}],"model":"llama-2-7b","stream":true}',
+                        },
+                        # the first, and the last two responses will be ignored
+                        # because they have no "content" or are [DONE]
+                        "response_timestamps": [4, 7, 11, 15, 18, 19],
+                        "response_outputs": [
+                            {"response": "data: "},
+                            {
+                                "response": 'data: {"id":"abc","object":"chat.completion.chunk","created":123,"model":"llama-2-7b","choices":[{"index":0,"delta":{"content":"I"},"finish_reason":null}]}\n\n'
+                            },
+                            {
+                                "response": 'data: {"id":"abc","object":"chat.completion.chunk","created":123,"model":"llama-2-7b","choices":[{"index":0,"delta":{"content":"don\'t"},"finish_reason":null}]}\n\n'
+                            },
+                            {
+                                "response": 'data: {"id":"abc","object":"chat.completion.chunk","created":123,"model":"llama-2-7b","choices":[{"index":0,"delta":{"content":"cook food"},"finish_reason":null}]}\n\n'
+                            },
+                            {"response": "data: \n\n"},
+                            {"response": "data: [DONE]\n\n"},
+                        ],
+                    },
+                ],
+            },
+        ],
+    }
+
+    triton_no_response_profile_data = {
+        "experiments": [
+            {
+                "experiment": {
+                    "mode": "concurrency",
+                    "value": 1,
+                },
+                "requests": [
+                    {
+                        "timestamp": 1,
+                        "request_inputs": {"text_input": "This is test"},
+                        "response_timestamps": [],
+                        "response_outputs": [],
+                    },
+                ],
+            },
+        ],
+    }
+
+    triton_zero_latency_profile_data = {
+        "experiments": [
+            {
+                "experiment": {
+                    "mode": "concurrency",
+                    "value": 1,
+                },
+                "requests": [
+                    {
+                        "timestamp": 1,
+                        "request_inputs": {"text_input": "This is test"},
+                        "response_timestamps": [3, 5, 8],
+                        "response_outputs": [
+                            {"text_output": "I"},
+                            {"text_output": " like"},
+                            {"text_output": " dogs"},
+                        ],
+                    },
+                    {
+                        "timestamp": 10,
+                        "request_inputs": {"text_input": "This is test too"},
+                        "response_timestamps": [10],
+                        "response_outputs": [
+                            {"text_output": "I"},
+                        ],
+                    },
+                ],
+            },
+        ],
+    }
+
     triton_profile_data = {
         "experiments": [
             {